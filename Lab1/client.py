@@ -9,26 +9,38 @@ import os
 import sys
 
 
+# Number of bytes read from the socket at a time
+RECV_SIZE = 65536
+
+
 def parse_response(response_bytes):
     try:
         header_end = response_bytes.find(b'\r\n\r\n')
         if header_end == -1:
             return None, {}, response_bytes
 
-        headers_section = response_bytes[:header_end].decode('utf-8')
         body = response_bytes[header_end + 4:]  # Skip the \r\n\r\n
 
         # Parse status line
-        lines = headers_section.split('\r\n')
-        status_line = lines[0]
+        line_end = response_bytes.find(b'\r\n', 0, header_end)
+        if line_end == -1:
+            line_end = header_end
+        status_line = response_bytes[:line_end]
 
-        status_code = int(status_line.split()[1])
+        status_code = int(status_line.split(None, 2)[1])
 
+        # Walk the header lines directly on bytes; values are only
+        # decoded when they are actually used
         headers = {}
-        for line in lines[1:]:
-            if ':' in line:
-                key, value = line.split(':', 1)
+        pos = line_end + 2
+        while pos < header_end:
+            line_end = response_bytes.find(b'\r\n', pos, header_end)
+            if line_end == -1:
+                line_end = header_end
+            key, sep, value = response_bytes[pos:line_end].partition(b':')
+            if sep:
                 headers[key.strip().lower()] = value.strip()
+            pos = line_end + 2
 
         return status_code, headers, body
 
@@ -37,39 +49,67 @@ def parse_response(response_bytes):
         return None, {}, response_bytes
 
 
-def make_request(host, port, path):
+def receive_response(client_socket):
+    # Collect chunks and join once, instead of re-copying the whole
+    # response on every +=
+    chunks = []
+    received = 0
+    expected = None
+    while expected is None or received < expected:
+        chunk = client_socket.recv(RECV_SIZE)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        received += len(chunk)
+
+        if expected is None:
+            # Once the headers are in, Content-Length tells where the
+            # response ends (needed when the connection stays open)
+            head = b''.join(chunks)
+            header_end = head.find(b'\r\n\r\n')
+            if header_end != -1:
+                chunks = [head]
+                _, headers, _ = parse_response(head[:header_end + 4])
+                length = headers.get(b'content-length')
+                if length is not None:
+                    expected = header_end + 4 + int(length)
+
+    return b''.join(chunks)
+
+
+def make_request(host, port, path, client_socket=None):
+    # When an already connected socket is passed in, the request asks for
+    # keep-alive and the socket is left open for the next request
+    keep_open = client_socket is not None
 
     try:
-        # Create TCP socket
-        client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if not keep_open:
+            # Create TCP socket
+            client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 
-        # Set timeout (10 seconds)
-        client_socket.settimeout(10)
+            # Set timeout (10 seconds)
+            client_socket.settimeout(10)
 
-        # Connect to server
-        print(f"Connecting to {host}:{port}...")
-        client_socket.connect((host, port))
+            # Connect to server
+            print(f"Connecting to {host}:{port}...")
+            client_socket.connect((host, port))
 
         # Build HTTP request
         request = f"GET {path} HTTP/1.1\r\n"
         request += f"Host: {host}\r\n"
-        request += "Connection: close\r\n"
+        request += "Connection: keep-alive\r\n" if keep_open else "Connection: close\r\n"
         request += "\r\n"
 
         # Send request
         print(f"Requesting: {path}")
-        client_socket.send(request.encode())
+        client_socket.sendall(request.encode())
 
         # Receive response
-        response = b''
-        while True:
-            chunk = client_socket.recv(4096)
-            if not chunk:
-                break
-            response += chunk
+        response = receive_response(client_socket)
 
         # Close socket
-        client_socket.close()
+        if not keep_open:
+            client_socket.close()
 
         return response
 
@@ -86,7 +126,7 @@ def make_request(host, port, path):
 
 
 def get_content_type(headers):
-    return headers.get('content-type', '').split(';')[0].strip()
+    return headers.get(b'content-type', b'').split(b';')[0].strip().decode('latin-1')
 
 
 def get_filename_from_path(path):
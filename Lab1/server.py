@@ -2,19 +2,85 @@
 
 import socket
 import os
+import queue
+import selectors
+import signal
+import stat
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 
-# MIME types for different file extensions
+# Maximum number of connections served at the same time (per process)
+MAX_WORKERS = 64
+
+# CPUs this process may run on (a container's cpuset can be smaller than
+# os.cpu_count()); None where the OS cannot report or set affinity
+ALLOWED_CPUS = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else None
+
+# Number of server processes sharing the port through SO_REUSEPORT
+NUM_PROCESSES = len(ALLOWED_CPUS) if ALLOWED_CPUS else (os.cpu_count() or 1)
+
+# Pending connections the kernel may queue (capped by net.core.somaxconn)
+LISTEN_BACKLOG = 4096
+
+# Size of the chunks used when streaming a file body
+CHUNK_SIZE = 65536
+
+# Text files up to this size are kept in memory between requests
+SMALL_FILE_LIMIT = 1024 * 1024
+
+# Bodies smaller than this are joined with the headers into one buffer
+COALESCE_LIMIT = 64 * 1024
+
+# Socket send/receive buffer size for large downloads
+SOCKET_BUFFER_SIZE = 1024 * 1024
+
+# Seconds an idle keep-alive connection is kept open
+KEEP_ALIVE_TIMEOUT = 5
+
+# Largest request head (request line + headers) accepted from a client
+MAX_REQUEST_SIZE = 8192
+
+# Longest request line accepted before the request is rejected
+MAX_REQUEST_LINE = 4096
+
+# MIME types for different file extensions (already encoded for the headers)
 MIME_TYPES = {
-    '.html': 'text/html',
-    '.png': 'image/png',
-    '.pdf': 'application/pdf'
+    '.html': b'text/html',
+    '.png': b'image/png',
+    '.pdf': b'application/pdf'
 }
 
+# Prebuilt responses, so nothing has to be formatted or encoded per request.
+# They stop before the blank line: the Connection header is added per request.
+OK_200 = b"HTTP/1.1 200 OK\r\nContent-Type: %s\r\nContent-Length: %d\r\n"
 
-def generate_directory_listing(directory_path, url_path):
-    html = f"""<!DOCTYPE html>
+KEEP_ALIVE = b"Connection: keep-alive\r\nKeep-Alive: timeout=%d\r\n\r\n" % KEEP_ALIVE_TIMEOUT
+CLOSE = b"Connection: close\r\n\r\n"
+
+RESPONSE_403 = b"HTTP/1.1 403 Forbidden\r\nContent-Length: 0\r\n"
+
+RESPONSE_404 = b"HTTP/1.1 404 Not Found\r\nContent-Type: text/html\r\nContent-Length: %d\r\n"
+BODY_404 = (b"<html><body><h1>404 Not Found</h1>"
+            b"<p>The file '%s' was not found on this server.</p>"
+            b"</body></html>")
+
+RESPONSE_405 = b"HTTP/1.1 405 Method Not Allowed\r\nContent-Length: 0\r\n"
+
+BODY_415 = (b"<html><body><h1>415 Unsupported Media Type</h1>"
+            b"<p>The file type is not supported.</p>"
+            b"</body></html>")
+RESPONSE_415 = (b"HTTP/1.1 415 Unsupported Media Type\r\n"
+                b"Content-Type: text/html\r\n"
+                b"Content-Length: %d\r\n" % len(BODY_415))
+
+RESPONSE_500 = b"HTTP/1.1 500 Internal Server Error\r\nContent-Length: 0\r\n"
+
+# Static parts of the directory listing page
+LISTING_HEAD = """<!DOCTYPE html>
 <html>
 <head>
     <title>Directory listing for {url_path}</title>
@@ -35,33 +101,119 @@ def generate_directory_listing(directory_path, url_path):
     <ul>
 """
 
+LISTING_TAIL = """    </ul>
+    <hr>
+</body>
+</html>"""
+
+
+def generate_directory_listing(directory_path, url_path):
+    parts = [LISTING_HEAD.format(url_path=url_path)]
+
     # Add parent directory link if not at root
     if url_path != '/':
         parent = '/'.join(url_path.rstrip('/').split('/')[:-1]) or '/'
-        html += f'        <li><a href="{parent}">[Parent Directory]</a></li>\n'
+        parts.append(f'        <li><a href="{parent}">[Parent Directory]</a></li>\n')
 
     # List all files and directories
     try:
-        items = sorted(os.listdir(directory_path))
-        for item in items:
-            item_path = os.path.join(directory_path, item)
-            if os.path.isdir(item_path):
+        prefix = url_path.rstrip('/') + '/'
+        # scandir() gives the entry type from the directory read itself,
+        # so no extra stat() is needed per entry
+        with os.scandir(directory_path) as it:
+            entries = sorted(it, key=lambda e: e.name)
+        for entry in entries:
+            item = entry.name
+            if entry.is_dir():
                 # Directory - add trailing slash
-                link = url_path.rstrip('/') + '/' + item + '/'
-                html += f'        <li class="dir"><a href="{link}">{item}/</a></li>\n'
+                parts.append(f'        <li class="dir"><a href="{prefix}{item}/">{item}/</a></li>\n')
             else:
                 # File
-                link = url_path.rstrip('/') + '/' + item
-                html += f'        <li><a href="{link}">{item}</a></li>\n'
+                parts.append(f'        <li><a href="{prefix}{item}">{item}</a></li>\n')
     except Exception as e:
-        html += f'        <li>Error listing directory: {e}</li>\n'
+        parts.append(f'        <li>Error listing directory: {e}</li>\n')
 
-    html += """    </ul>
-    <hr>
-</body>
-</html>"""
+    parts.append(LISTING_TAIL)
+
+    return ''.join(parts)
+
+
+# Cached responses are keyed by the file's mtime and size, so editing
+# a file or a directory automatically produces a new cache entry
+@lru_cache(maxsize=256)
+def cached_directory_listing(directory_path, url_path, mtime_ns):
+    body = generate_directory_listing(directory_path, url_path).encode()
+
+    return OK_200 % (b'text/html', len(body)), body
+
+
+@lru_cache(maxsize=256)
+def cached_small_file(file_path, content_type, mtime_ns, size):
+    with open(file_path, 'rb') as f:
+        body = f.read()
+
+    return OK_200 % (content_type, len(body)), body
+
+
+def tune_client_socket(client_socket):
+    # Disable Nagle so short responses are not held back waiting for an ACK
+    client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE)
+    client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
+
+
+def set_cork(client_socket, enabled):
+    # TCP_CORK (Linux only) holds back partial segments until uncorked,
+    # so headers and the start of the body leave in full-sized packets
+    if hasattr(socket, 'TCP_CORK'):
+        client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_CORK, 1 if enabled else 0)
+
+
+def send_response(client_socket, headers, body):
+    # Send headers and body with a single call instead of two separate sends
+    if len(body) < COALESCE_LIMIT:
+        client_socket.sendall(headers + body)
+        return
 
-    return html
+    # Larger bodies use a vectored write so they are not copied into one buffer
+    sent = client_socket.sendmsg([headers, body])
+    if sent < len(headers):
+        client_socket.sendall(headers[sent:])
+        sent = len(headers)
+    # The socket timeout limits each sendall() as a whole, so the rest goes
+    # out in chunks and a slow client gets the full timeout for every chunk
+    view = memoryview(body)
+    for offset in range(sent - len(headers), len(body), CHUNK_SIZE):
+        client_socket.sendall(view[offset:offset + CHUNK_SIZE])
+
+
+class ConnectionState:
+    # Buffers allocated once per worker thread and reused for every
+    # request and connection it serves
+    def __init__(self):
+        self.recv_buffer = bytearray(MAX_REQUEST_SIZE)
+        self.filled = 0  # bytes of the next request already in recv_buffer
+        self.chunk_buffer = bytearray(CHUNK_SIZE)
+
+
+_thread_data = threading.local()
+
+
+def get_connection_state():
+    state = getattr(_thread_data, 'state', None)
+    if state is None:
+        state = _thread_data.state = ConnectionState()
+    return state
+
+
+def sendfile_fallback(client_socket, file_path):
+    # Stream the file in fixed-size chunks through the thread's reusable
+    # buffer, so memory use stays bounded and no chunk is allocated
+    view = memoryview(get_connection_state().chunk_buffer)
+    with open(file_path, 'rb') as f:
+        while n := f.readinto(view):
+            client_socket.sendall(view[:n])
+    view.release()
 
 
 def get_content_type(file_path):
@@ -70,108 +222,331 @@ def get_content_type(file_path):
     return MIME_TYPES.get(ext)
 
 
-def handle_request(client_socket, base_directory):
+def read_request(client_socket, state):
+    # Receive into the state's buffer until the end of the request head.
+    # Bytes after it are moved to the front and kept for the next request
+    # on the connection. Returns the request head, or None to close.
+    buffer = state.recv_buffer
+    filled = state.filled
+    view = memoryview(buffer)
+    while True:
+        # Reject a request line longer than MAX_REQUEST_LINE, whether or not
+        # the rest of the head has arrived with it
+        if filled > MAX_REQUEST_LINE and buffer.find(b'\r\n', 0, MAX_REQUEST_LINE + 2) == -1:
+            return None
+
+        header_end = buffer.find(b'\r\n\r\n', 0, filled)
+        if header_end != -1:
+            break
+
+        # Reject oversized requests instead of reading forever
+        if filled == len(buffer):
+            return None
+
+        n = client_socket.recv_into(view[filled:])
+        if not n:
+            return None
+        filled += n
+        state.filled = filled
+
+    request = bytes(view[:header_end])
+    state.filled = filled - header_end - 4
+    if state.filled:
+        # Copied out first: source and target overlap in the same buffer
+        buffer[:state.filled] = bytes(view[header_end + 4:filled])
+    view.release()
+    return request
+
+
+def is_inside(path, real_base):
+    return path == real_base or path.startswith(real_base + os.sep)
+
+
+def resolve_path(real_base, url_path):
+    # real_base is resolved once at startup. '..' is handled by normpath,
+    # and realpath() is only needed when a symlink below the base is found.
+    # Returns (path, stat result) - the stat is None if the path does not
+    # exist, and the path is None if it lies outside the base directory.
+    file_path = os.path.normpath(os.path.join(real_base, url_path))
+    if not is_inside(file_path, real_base):
+        return None, None
+
+    # The lstat() of the last component doubles as the file's stat,
+    # so checking for symlinks, type and size costs no extra syscalls
+    st = None
+    path = real_base
+    for part in file_path[len(real_base):].split(os.sep):
+        if not part:
+            continue
+        path = os.path.join(path, part)
+        try:
+            st = os.lstat(path)
+        except OSError:
+            return file_path, None
 
-    try:
+        if stat.S_ISLNK(st.st_mode):
+            real_file = os.path.realpath(file_path)
+            if not is_inside(real_file, real_base):
+                return None, None
+            try:
+                return real_file, os.stat(real_file)
+            except OSError:
+                return real_file, None
 
-        request = client_socket.recv(1024).decode('utf-8')
+    if st is None:
+        st = os.stat(real_base)
 
-        lines = request.split('\n')
-        if not lines:
-            return
+    return file_path, st
+
+
+def handle_request(client_socket, base_directory, request):
+    # Returns True if the connection can be reused for another request
+    try:
 
-        request_line = lines[0]
-        print(f"Request: {request_line}")
+        # Only the request line is decoded; headers are checked as bytes
+        line_end = request.find(b'\r\n')
+        if line_end == -1:
+            line_end = len(request)
+        request_line = request[:line_end]
+        print(f"Request: {request_line.decode('latin-1')}")
 
-        parts = request_line.split()
+        parts = request_line.split(b' ', 2)
         if len(parts) < 2:
-            return
+            return False
 
         method = parts[0]
-        url_path = parts[1]
-
-        # Only handle GET requests
-        if method != 'GET':
-            response = "HTTP/1.1 405 Method Not Allowed\r\n\r\n"
-            client_socket.send(response.encode())
-            return
+        url_path = parts[1].decode('utf-8')
+        version = parts[2] if len(parts) > 2 else b'HTTP/1.0'
+
+        # HTTP/1.1 connections stay open unless the client asks to close.
+        # The header is found with one C-level find() on the lowered head
+        # instead of splitting and looping over every header line in Python.
+        connection = b''
+        lowered = request.lower()
+        pos = lowered.find(b'\r\nconnection:', line_end)
+        if pos != -1:
+            pos += len(b'\r\nconnection:')
+            value_end = lowered.find(b'\r\n', pos)
+            connection = lowered[pos:value_end if value_end != -1 else len(lowered)].strip()
+        keep_alive = version == b'HTTP/1.1' and connection != b'close'
+
+        # A request body is never read, so it would be taken for the next
+        # request; close the connection after any request that announces one
+        if (lowered.find(b'\r\ncontent-length:', line_end) != -1
+                or lowered.find(b'\r\ntransfer-encoding:', line_end) != -1):
+            keep_alive = False
+
+        end = KEEP_ALIVE if keep_alive else CLOSE
+
+        # Only handle GET requests. Other methods may carry a body, so the
+        # connection is closed instead of reading on after it.
+        if method != b'GET':
+            client_socket.sendall(RESPONSE_405 + CLOSE)
+            return False
 
         if url_path == '/':
             url_path = 'index.html'  # Default file
         else:
             url_path = url_path.lstrip('/')
 
-        file_path = os.path.join(base_directory, url_path)
-
-        real_base = os.path.realpath(base_directory)
-        real_file = os.path.realpath(file_path)
+        file_path, st = resolve_path(base_directory, url_path)
 
-        if not real_file.startswith(real_base):
+        if file_path is None:
             # try to access files outside the base directory
-            response = "HTTP/1.1 403 Forbidden\r\n\r\n"
-            client_socket.send(response.encode())
-            return
-
-        if os.path.isdir(file_path):
-            html_content = generate_directory_listing(file_path, '/' + url_path)
-
-            response = "HTTP/1.1 200 OK\r\n"
-            response += "Content-Type: text/html\r\n"
-            response += f"Content-Length: {len(html_content)}\r\n"
-            response += "\r\n"
+            client_socket.sendall(RESPONSE_403 + end)
+            return keep_alive
 
-            client_socket.send(response.encode())
-            client_socket.send(html_content.encode())
-            return
+        if st is not None and stat.S_ISDIR(st.st_mode):
+            headers, body = cached_directory_listing(file_path, '/' + url_path, st.st_mtime_ns)
 
-        if not os.path.isfile(file_path):
-            response = "HTTP/1.1 404 Not Found\r\n"
-            response += "Content-Type: text/html\r\n"
-            response += "\r\n"
-            response += "<html><body><h1>404 Not Found</h1>"
-            response += f"<p>The file '{url_path}' was not found on this server.</p>"
-            response += "</body></html>"
+            send_response(client_socket, headers + end, body)
+            return keep_alive
 
-            client_socket.send(response.encode())
-            return
+        if st is None or not stat.S_ISREG(st.st_mode):
+            body = BODY_404 % url_path.encode()
+            send_response(client_socket, RESPONSE_404 % len(body) + end, body)
+            return keep_alive
 
         content_type = get_content_type(file_path)
 
         if content_type is None:
-            response = "HTTP/1.1 415 Unsupported Media Type\r\n"
-            response += "Content-Type: text/html\r\n"
-            response += "\r\n"
-            response += "<html><body><h1>415 Unsupported Media Type</h1>"
-            response += f"<p>The file type is not supported.</p>"
-            response += "</body></html>"
-
-            client_socket.send(response.encode())
-            return
-
-        if content_type in ['image/png', 'application/pdf']:
-            with open(file_path, 'rb') as f:
-                file_content = f.read()
-        else:
-            with open(file_path, 'r') as f:
-                file_content = f.read().encode()
+            send_response(client_socket, RESPONSE_415 + end, BODY_415)
+            return keep_alive
+
+        if content_type == b'text/html' and st.st_size <= SMALL_FILE_LIMIT:
+            headers, body = cached_small_file(file_path, content_type, st.st_mtime_ns, st.st_size)
+
+            send_response(client_socket, headers + end, body)
 
-        response = "HTTP/1.1 200 OK\r\n"
-        response += f"Content-Type: {content_type}\r\n"
-        response += f"Content-Length: {len(file_content)}\r\n"
-        response += "\r\n"
+            print(f"Sent: {file_path} ({content_type.decode()})")
+            return keep_alive
 
-        client_socket.send(response.encode())
-        client_socket.send(file_content)
+        set_cork(client_socket, True)
+        try:
+            client_socket.sendall(OK_200 % (content_type, st.st_size) + end)
+
+            if content_type in (b'image/png', b'application/pdf'):
+                # sendfile() lets the kernel copy the file straight to the socket
+                # (it falls back to plain send() where sendfile(2) is unavailable)
+                with open(file_path, 'rb') as f:
+                    client_socket.sendfile(f)
+            else:
+                sendfile_fallback(client_socket, file_path)
+        finally:
+            set_cork(client_socket, False)
 
-        print(f"Sent: {file_path} ({content_type})")
+        print(f"Sent: {file_path} ({content_type.decode()})")
+        return keep_alive
 
     except Exception as e:
         print(f"Error handling request: {e}")
         try:
-            response = "HTTP/1.1 500 Internal Server Error\r\n\r\n"
-            client_socket.send(response.encode())
+            client_socket.sendall(RESPONSE_500 + CLOSE)
         except:
             pass
+        return False
+
+
+def serve_connection(client_socket, base_directory, pending, resume):
+    # Serve the requests that have arrived on this connection. When the next
+    # request is not complete yet, the connection and the bytes read so far
+    # go back to the event loop through resume(), so an idle or slow client
+    # does not hold this thread while it waits.
+    state = get_connection_state()
+    state.recv_buffer[:len(pending)] = pending
+    state.filled = len(pending)
+    handed_back = False
+    try:
+        while True:
+            # Read only what has already arrived; responses are sent with
+            # the normal timeout
+            client_socket.settimeout(0)
+            try:
+                request = read_request(client_socket, state)
+            except BlockingIOError:
+                resume(client_socket, bytes(state.recv_buffer[:state.filled]))
+                handed_back = True
+                break
+            client_socket.settimeout(KEEP_ALIVE_TIMEOUT)
+
+            if request is None:
+                break
+            if not handle_request(client_socket, base_directory, request):
+                break
+    except (socket.timeout, ConnectionError):
+        pass
+    finally:
+        if not handed_back:
+            client_socket.close()
+
+
+def check_port_free(host, port):
+    # With SO_REUSEPORT the workers would quietly share the port with any
+    # other server already listening on it. A plain bind without that
+    # option still fails with EADDRINUSE, so try one first.
+    probe = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        probe.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        probe.bind((host, port))
+    finally:
+        probe.close()
+
+
+def create_server_socket(host, port):
+    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+
+    # Lets every worker process bind its own socket to the same port;
+    # the kernel then spreads new connections across them
+    if hasattr(socket, 'SO_REUSEPORT'):
+        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+
+    server_socket.bind((host, port))
+
+    server_socket.listen(LISTEN_BACKLOG)
+
+    return server_socket
+
+
+def run_worker(server_socket, real_base):
+    # An event loop waits on the listening socket and on every connection
+    # between requests. A connection only gets a worker thread once it has
+    # data to read, so idle keep-alive or slow clients never tie up the pool.
+    pool = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+    selector = selectors.DefaultSelector()
+    server_socket.setblocking(False)
+    selector.register(server_socket, selectors.EVENT_READ)
+
+    # Worker threads hand connections back through this queue; a byte on
+    # the socket pair wakes select() so they are registered right away
+    returned = queue.SimpleQueue()
+    wake_r, wake_w = socket.socketpair()
+    wake_r.setblocking(False)
+    wake_w.setblocking(False)
+    selector.register(wake_r, selectors.EVENT_READ)
+
+    def resume(client_socket, pending):
+        returned.put((client_socket, pending))
+        try:
+            wake_w.send(b'\0')
+        except OSError:
+            pass  # already full of wake-ups
+
+    # Connections waiting for a request, closed if it does not come in time
+    deadlines = {}  # {client_socket: deadline}
+
+    try:
+        while True:
+            for key, _ in selector.select(timeout=1.0):
+                if key.fileobj is server_socket:
+                    try:
+                        client_socket, client_address = server_socket.accept()
+                    except BlockingIOError:
+                        continue
+                    print(f"\nConnection from {client_address}")
+
+                    tune_client_socket(client_socket)
+                    client_socket.settimeout(KEEP_ALIVE_TIMEOUT)
+                    selector.register(client_socket, selectors.EVENT_READ, b'')
+                    deadlines[client_socket] = time.monotonic() + KEEP_ALIVE_TIMEOUT
+                elif key.fileobj is wake_r:
+                    try:
+                        wake_r.recv(4096)
+                    except BlockingIOError:
+                        pass
+                else:
+                    # Data arrived - a worker thread reads and answers it
+                    client_socket = key.fileobj
+                    selector.unregister(client_socket)
+                    del deadlines[client_socket]
+                    pool.submit(serve_connection, client_socket, real_base, key.data, resume)
+
+            while True:
+                try:
+                    client_socket, pending = returned.get_nowait()
+                except queue.Empty:
+                    break
+                selector.register(client_socket, selectors.EVENT_READ, pending)
+                deadlines[client_socket] = time.monotonic() + KEEP_ALIVE_TIMEOUT
+
+            now = time.monotonic()
+            for client_socket, deadline in list(deadlines.items()):
+                if now >= deadline:
+                    selector.unregister(client_socket)
+                    del deadlines[client_socket]
+                    client_socket.close()
+
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.shutdown(wait=False)
+        for client_socket in deadlines:
+            client_socket.close()
+        selector.close()
+        wake_r.close()
+        wake_w.close()
+        server_socket.close()
 
 
 def main():
@@ -188,36 +563,80 @@ def main():
         print(f"Error: Directory '{directory}' does not exist!")
         sys.exit(1)
 
+    # Resolved once here instead of on every request
+    real_base = os.path.realpath(directory)
+
     # Server configuration
     HOST = '0.0.0.0'  # Listen on all network interfaces
     PORT = 8080  # Port number
 
-    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-
-    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    # Bind once in the parent so errors such as a busy port show up here
+    check_port_free(HOST, PORT)
+    server_socket = create_server_socket(HOST, PORT)
 
-    server_socket.bind((HOST, PORT))
-
-    server_socket.listen(5)
+    # Several processes are only possible with fork() and SO_REUSEPORT
+    num_processes = NUM_PROCESSES
+    if not (hasattr(os, 'fork') and hasattr(socket, 'SO_REUSEPORT')):
+        num_processes = 1
 
     print(f"Server started on http://{HOST}:{PORT}")
     print(f"Serving files from: {os.path.abspath(directory)}")
+    print(f"Worker processes: {num_processes}")
     print("Press Ctrl+C to stop the server")
 
-    try:
-        while True:
-            client_socket, client_address = server_socket.accept()
-            print(f"\nConnection from {client_address}")
-
-            handle_request(client_socket, directory)
-
-            client_socket.close()
+    if num_processes == 1:
+        run_worker(server_socket, real_base)
+        print("\nShutting down server...")
+        return
+
+    # Flush the banner first, or every child would print it again
+    # from its copy of the stdout buffer
+    sys.stdout.flush()
+
+    # Fork one process per CPU; the GIL limits each process to one core
+    children = []
+    for i in range(num_processes):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                if ALLOWED_CPUS:
+                    os.sched_setaffinity(0, {ALLOWED_CPUS[i % len(ALLOWED_CPUS)]})
+
+                # The first child reuses the parent's socket, the others
+                # open their own so each gets a separate accept queue
+                worker_socket = server_socket if i == 0 else create_server_socket(HOST, PORT)
+            except OSError as e:
+                print(f"Worker {i} failed to start: {e}", file=sys.stderr)
+                sys.stderr.flush()
+                os._exit(1)
+
+            try:
+                run_worker(worker_socket, real_base)
+            finally:
+                sys.stdout.flush()
+                os._exit(0)
+        children.append(pid)
+
+    server_socket.close()
+
+    # Turn SIGTERM (e.g. docker stop) into a normal exit so the workers
+    # are stopped as well
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
 
+    try:
+        for pid in children:
+            os.waitpid(pid, 0)
     except KeyboardInterrupt:
+        # Ctrl+C reaches the whole process group, so the workers stop too
         print("\nShutting down server...")
     finally:
-        server_socket.close()
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
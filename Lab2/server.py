@@ -2,12 +2,18 @@
 
 import socket
 import os
+import html
+import string
 import sys
+import queue
+import selectors
 import threading
 import time
 from pathlib import Path
-from collections import defaultdict
-from datetime import datetime
+from collections import defaultdict, deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
 
 # MIME types for different file extensions
 MIME_TYPES = {
@@ -16,18 +22,167 @@ MIME_TYPES = {
     '.pdf': 'application/pdf'
 }
 
-request_counts = defaultdict(int)  # {file_path: count}
-request_counts_lock = threading.Lock()  # Protects request_counts
+# Shared state below is split into shards with one lock each, so that
+# requests for different files / from different clients rarely wait on the same lock
+SHARDS = 32
+
+# Per-file request counts
+request_counts = [defaultdict(int) for _ in range(SHARDS)]  # {file_path: count}
+request_counts_locks = [threading.Lock() for _ in range(SHARDS)]
 
-rate_limit_data = defaultdict(list)
-rate_limit_lock = threading.Lock()
 RATE_LIMIT = 5  # requests per second
 RATE_WINDOW = 1.0  # time window in seconds
+RATE_IDLE_TIMEOUT = 60.0  # forget clients idle for this many seconds
+# Timestamps of each client's recent requests; never more than RATE_LIMIT kept
+rate_limit_data = [defaultdict(lambda: deque(maxlen=RATE_LIMIT)) for _ in range(SHARDS)]
+rate_limit_locks = [threading.Lock() for _ in range(SHARDS)]
 
 # Statistics
 total_requests = 0
 total_requests_lock = threading.Lock()
 
+# Counter updates are first collected per worker thread and merged into the
+# shared counters in one go when a connection ends (or every COUNT_FLUSH_EVERY
+# requests), instead of taking a lock on every request
+COUNT_FLUSH_EVERY = 32
+_local_counts = threading.local()
+
+# Optional delay per request (seconds), only for demonstrating concurrency,
+# e.g. SERVER_ARTIFICIAL_DELAY=1 python server.py ./content
+ARTIFICIAL_DELAY = float(os.environ.get("SERVER_ARTIFICIAL_DELAY", "0"))
+
+# Rendered directory listings, keyed by (directory_path, url_path) and
+# rebuilt when the directory's mtime changes. Counters are filled in per request.
+LISTING_CACHE_SIZE = 256
+_listing_cache = OrderedDict()  # {(directory_path, url_path): (mtime_ns, pieces, rel_paths)}
+_listing_cache_lock = threading.Lock()
+
+# Contents of small files kept in memory, least recently used evicted first
+FILE_CACHE_MAX_BYTES = 64 * 1024 * 1024  # total size of cached files
+FILE_CACHE_MAX_FILE = 1024 * 1024  # larger files are always sent with sendfile()
+_file_cache = OrderedDict()  # {file_path: (mtime_ns, content)}
+_file_cache_lock = threading.Lock()
+_file_cache_bytes = 0
+
+# Responses from memory are sent in slices of this size: the socket timeout
+# limits each sendall() call as a whole, so a slow client needs one per slice
+SEND_CHUNK = 256 * 1024
+
+# How long clients may reuse a file without asking the server again
+CACHE_MAX_AGE = 3600
+
+# Limits for reading a request, so a client cannot make the server buffer forever
+MAX_REQUEST_LINE = 4096
+MAX_HEADER_LINE = 8192
+MAX_HEADERS = 100
+
+# Seconds a connection may stay open without sending a request
+REQUEST_TIMEOUT = 10.0
+
+# Seconds a kept-alive connection may stay idle between requests
+KEEP_ALIVE_TIMEOUT = 5
+
+# Listening sockets on the same port, each with its own accept loop thread
+# (needs SO_REUSEPORT; otherwise a single socket is used)
+NUM_ACCEPTORS = (os.cpu_count() or 1) if hasattr(socket, 'SO_REUSEPORT') else 1
+
+# Length of each accept queue, deep enough for bursts of new connections
+# (the kernel caps it at net.core.somaxconn)
+LISTEN_BACKLOG = 1024
+
+# Static parts of the directory listing page, built once at import.
+# Names and paths are HTML-escaped before they go into any of them.
+LISTING_HEAD = string.Template("""<!DOCTYPE html>
+<html>
+<head>
+    <title>Directory listing for $url_path</title>
+    <style>
+        body { font-family: Arial, sans-serif; margin: 40px; background: #f5f5f5; }
+        h1 { color: #333; }
+        .stats { background: #e3f2fd; padding: 15px; border-radius: 5px; margin: 20px 0; }
+        ul { list-style: none; padding: 0; }
+        li { padding: 12px; margin: 8px 0; background: white; border-left: 4px solid #2196F3; 
+              border-radius: 4px; display: flex; justify-content: space-between; align-items: center; }
+        li:hover { background: #f0f0f0; }
+        a { text-decoration: none; color: #0066cc; font-weight: bold; }
+        a:hover { text-decoration: underline; }
+        .dir { border-left-color: #FF9800; }
+        .count { 
+            background: #4CAF50; 
+            color: white; 
+            padding: 4px 12px; 
+            border-radius: 12px; 
+            font-size: 0.9em;
+            font-weight: bold;
+        }
+    </style>
+</head>
+<body>
+    <h1>Directory listing for $url_path</h1>
+    <div class="stats">
+        <strong>Total server requests:</strong> """)
+
+LISTING_STATS_END = """
+    </div>
+    <hr>
+    <ul>
+"""
+
+LISTING_TAIL = """    </ul>
+    <hr>
+    <p style="color: #666; font-size: 0.9em;">
+        Request counters are tracked server-wide and persist during server runtime
+    </p>
+</body>
+</html>"""
+
+# List items of the listing page; the request count goes between an item
+# template and its matching *_END
+LI_PARENT = '        <li><a href="{link}"> [Parent Directory]</a></li>\n'
+LI_DIR = '        <li class="dir"><a href="{link}"> {name}/</a><span class="count">'
+LI_DIR_END = ' views</span></li>\n'
+LI_FILE = '        <li><a href="{link}"> {name}</a><span class="count">'
+LI_FILE_END = ' requests</span></li>\n'
+
+# Prebuilt responses that never change, encoded once at import. They stop
+# before the blank line; one of the Connection endings below completes them.
+KEEP_ALIVE = b"Connection: keep-alive\r\nKeep-Alive: timeout=%d\r\n\r\n" % KEEP_ALIVE_TIMEOUT
+CLOSE = b"Connection: close\r\n\r\n"
+
+BODY_429 = (b"<html><body><h1>429 Too Many Requests</h1>"
+            b"<p>Rate limit exceeded. Please slow down.</p>"
+            b"<p>Limit: %d requests per second</p>"
+            b"</body></html>" % RATE_LIMIT)
+RESPONSE_429 = (b"HTTP/1.1 429 Too Many Requests\r\n"
+                b"Content-Type: text/html\r\n"
+                b"Content-Length: %d\r\n"
+                b"Retry-After: 1\r\n" % len(BODY_429))
+
+RESPONSE_403 = b"HTTP/1.1 403 Forbidden\r\nContent-Length: 0\r\n"
+
+BODY_404 = (b"<html><body><h1>404 Not Found</h1>"
+            b"<p>The file '%s' was not found on this server.</p>"
+            b"</body></html>")
+RESPONSE_404 = (b"HTTP/1.1 404 Not Found\r\n"
+                b"Content-Type: text/html\r\n"
+                b"Content-Length: %d\r\n")
+
+RESPONSE_405 = b"HTTP/1.1 405 Method Not Allowed\r\nContent-Length: 0\r\n"
+
+BODY_415 = b"<html><body><h1>415 Unsupported Media Type</h1></body></html>"
+RESPONSE_415 = (b"HTTP/1.1 415 Unsupported Media Type\r\n"
+                b"Content-Type: text/html\r\n"
+                b"Content-Length: %d\r\n" % len(BODY_415))
+
+RESPONSE_500 = b"HTTP/1.1 500 Internal Server Error\r\nContent-Length: 0\r\n"
+
+# Worker threads that handle connections (reused instead of one new thread per request)
+MAX_WORKERS = max(16, (os.cpu_count() or 1) * 2)
+
+
+def _shard(key):
+    return hash(key) % SHARDS
+
 
 def is_rate_limited(client_ip):
     """
@@ -39,116 +194,191 @@ def is_rate_limited(client_ip):
     Returns:
         True if rate limited, False otherwise
     """
-    with rate_limit_lock:
-        current_time = time.time()
+    shard = _shard(client_ip)
+    with rate_limit_locks[shard]:
+        current_time = time.monotonic()
+        timestamps = rate_limit_data[shard][client_ip]
 
-        # Remove old timestamps outside the window
-        rate_limit_data[client_ip] = [
-            ts for ts in rate_limit_data[client_ip]
-            if current_time - ts < RATE_WINDOW
-        ]
+        # Remove old timestamps outside the window (oldest are at the front)
+        while timestamps and current_time - timestamps[0] >= RATE_WINDOW:
+            timestamps.popleft()
 
         # Check if rate limit exceeded
-        if len(rate_limit_data[client_ip]) >= RATE_LIMIT:
+        if len(timestamps) >= RATE_LIMIT:
             return True
 
         # Add current timestamp
-        rate_limit_data[client_ip].append(current_time)
+        timestamps.append(current_time)
         return False
 
 
+def reap_idle_clients():
+    """
+    Periodically drop rate-limit entries of clients that went quiet,
+    so memory does not grow with every IP ever seen
+    """
+    while True:
+        time.sleep(RATE_IDLE_TIMEOUT)
+        for data, lock in zip(rate_limit_data, rate_limit_locks):
+            with lock:
+                current_time = time.monotonic()
+                idle = [ip for ip, timestamps in data.items()
+                        if not timestamps or current_time - timestamps[-1] >= RATE_IDLE_TIMEOUT]
+                for ip in idle:
+                    del data[ip]
+
+
+def _pending_counts():
+    # This thread's counter updates that are not merged yet
+    local = _local_counts
+    if not hasattr(local, 'files'):
+        local.files = defaultdict(int)
+        local.total = 0
+        local.updates = 0
+    return local
+
+
+def flush_request_counts():
+    """
+    Merge this thread's pending counter updates into the shared counters,
+    taking each shard lock once
+    """
+    global total_requests
+    local = _pending_counts()
+    if not local.updates:
+        return
+
+    by_shard = defaultdict(list)
+    for file_path, count in local.files.items():
+        by_shard[_shard(file_path)].append((file_path, count))
+    for shard, items in by_shard.items():
+        with request_counts_locks[shard]:
+            counts = request_counts[shard]
+            for file_path, count in items:
+                counts[file_path] += count
+
+    if local.total:
+        with total_requests_lock:
+            total_requests += local.total
+
+    local.files.clear()
+    local.total = 0
+    local.updates = 0
+
+
+def _count_update(local):
+    local.updates += 1
+    if local.updates >= COUNT_FLUSH_EVERY:
+        flush_request_counts()
+
+
 def increment_request_count(file_path):
-    with request_counts_lock:
-        request_counts[file_path] += 1
+    local = _pending_counts()
+    local.files[file_path] += 1
+    _count_update(local)
 
 
 def get_request_count(file_path):
-    with request_counts_lock:
-        return request_counts[file_path]
+    # Includes this thread's own pending updates; other threads' show up
+    # once their connections end
+    shard = _shard(file_path)
+    with request_counts_locks[shard]:
+        count = request_counts[shard].get(file_path, 0)
+    return count + _pending_counts().files.get(file_path, 0)
 
 
 def increment_total_requests():
-    global total_requests
+    local = _pending_counts()
+    local.total += 1
+    _count_update(local)
+
+
+def get_total_requests():
     with total_requests_lock:
-        total_requests += 1
+        return total_requests + _pending_counts().total
 
 
-def generate_directory_listing(directory_path, url_path, base_directory):
-    html = f"""<!DOCTYPE html>
-<html>
-<head>
-    <title>Directory listing for {url_path}</title>
-    <style>
-        body {{ font-family: Arial, sans-serif; margin: 40px; background: #f5f5f5; }}
-        h1 {{ color: #333; }}
-        .stats {{ background: #e3f2fd; padding: 15px; border-radius: 5px; margin: 20px 0; }}
-        ul {{ list-style: none; padding: 0; }}
-        li {{ padding: 12px; margin: 8px 0; background: white; border-left: 4px solid #2196F3; 
-              border-radius: 4px; display: flex; justify-content: space-between; align-items: center; }}
-        li:hover {{ background: #f0f0f0; }}
-        a {{ text-decoration: none; color: #0066cc; font-weight: bold; }}
-        a:hover {{ text-decoration: underline; }}
-        .dir {{ border-left-color: #FF9800; }}
-        .count {{ 
-            background: #4CAF50; 
-            color: white; 
-            padding: 4px 12px; 
-            border-radius: 12px; 
-            font-size: 0.9em;
-            font-weight: bold;
-        }}
-    </style>
-</head>
-<body>
-    <h1>Directory listing for {url_path}</h1>
-    <div class="stats">
-        <strong>Total server requests:</strong> {total_requests}
-    </div>
-    <hr>
-    <ul>
-"""
+def _render_listing_template(directory_path, url_path, base_directory):
+    # Builds the page without the request counters: pieces[0] goes before the
+    # total request count and pieces[i + 1] before the count of rel_paths[i]
+    pieces = []
+    rel_paths = []
+
+    pieces.append(LISTING_HEAD.substitute(url_path=html.escape(url_path)))
+
+    # Parts of the piece being built, joined once when a counter slot is reached
+    parts = [LISTING_STATS_END]
 
     # Add parent directory link if not at root
     if url_path != '/':
         parent = '/'.join(url_path.rstrip('/').split('/')[:-1]) or '/'
-        html += f'        <li><a href="{parent}"> [Parent Directory]</a></li>\n'
+        parts.append(LI_PARENT.format(link=html.escape(parent)))
 
     # List all files and directories with request counts
     try:
-        items = sorted(os.listdir(directory_path))
-        for item in items:
-            item_path = os.path.join(directory_path, item)
-
-            # Calculate relative path for counting
-            rel_path = os.path.relpath(item_path, base_directory)
-            count = get_request_count(rel_path)
-
-            if os.path.isdir(item_path):
+        # scandir() reports each entry's type from the directory read,
+        # so no extra stat() per entry is needed for is_dir()
+        with os.scandir(directory_path) as it:
+            entries = sorted(it, key=lambda e: e.name)
+
+        # Relative path of this directory, computed once for all entries
+        dir_rel = os.path.relpath(directory_path, base_directory)
+        rel_prefix = '' if dir_rel == '.' else dir_rel + os.sep
+        link_prefix = url_path.rstrip('/') + '/'
+
+        for entry in entries:
+            item = entry.name
+            link = html.escape(link_prefix + item)
+            name = html.escape(item)
+
+            if entry.is_dir():
                 # Directory - add trailing slash
-                link = url_path.rstrip('/') + '/' + item + '/'
-                html += f'        <li class="dir">'
-                html += f'<a href="{link}"> {item}/</a>'
-                html += f'<span class="count">{count} views</span>'
-                html += f'</li>\n'
+                parts.append(LI_DIR.format(link=link + '/', name=name))
+                end = LI_DIR_END
             else:
                 # File
-                link = url_path.rstrip('/') + '/' + item
-                html += f'        <li>'
-                html += f'<a href="{link}"> {item}</a>'
-                html += f'<span class="count">{count} requests</span>'
-                html += f'</li>\n'
+                parts.append(LI_FILE.format(link=link, name=name))
+                end = LI_FILE_END
+
+            pieces.append(''.join(parts))
+            rel_paths.append(rel_prefix + item)
+            parts = [end]
     except Exception as e:
-        html += f'        <li>Error listing directory: {e}</li>\n'
+        parts.append(f'        <li>Error listing directory: {html.escape(str(e))}</li>\n')
 
-    html += """    </ul>
-    <hr>
-    <p style="color: #666; font-size: 0.9em;">
-        Request counters are tracked server-wide and persist during server runtime
-    </p>
-</body>
-</html>"""
+    parts.append(LISTING_TAIL)
+    pieces.append(''.join(parts))
+
+    return pieces, rel_paths
 
-    return html
+
+def generate_directory_listing(directory_path, url_path, base_directory):
+    key = (directory_path, url_path)
+    mtime_ns = os.stat(directory_path).st_mtime_ns
+
+    with _listing_cache_lock:
+        cached = _listing_cache.get(key)
+        if cached is not None:
+            _listing_cache.move_to_end(key)
+
+    if cached is not None and cached[0] == mtime_ns:
+        _, pieces, rel_paths = cached
+    else:
+        pieces, rel_paths = _render_listing_template(directory_path, url_path, base_directory)
+        with _listing_cache_lock:
+            _listing_cache[key] = (mtime_ns, pieces, rel_paths)
+            _listing_cache.move_to_end(key)
+            while len(_listing_cache) > LISTING_CACHE_SIZE:
+                _listing_cache.popitem(last=False)
+
+    # Fill in the current counters
+    parts = [pieces[0], str(get_total_requests())]
+    for piece, rel_path in zip(pieces[1:], rel_paths):
+        parts.append(piece)
+        parts.append(str(get_request_count(rel_path)))
+    parts.append(pieces[-1])
+
+    return ''.join(parts)
 
 
 def get_content_type(file_path):
@@ -156,139 +386,470 @@ def get_content_type(file_path):
     return MIME_TYPES.get(ext)
 
 
-def handle_request(client_socket, client_address, base_directory):
-    client_ip = client_address[0]
+def get_cached_file(file_path, st):
+    """
+    Return the contents of a small file, read from disk only on a cache miss
+
+    Args:
+        file_path: path of the file
+        st: os.stat() result of the file, used to detect changes
+
+    Returns:
+        File contents as bytes
+    """
+    global _file_cache_bytes
+
+    with _file_cache_lock:
+        cached = _file_cache.get(file_path)
+        if cached is not None and cached[0] == st.st_mtime_ns and len(cached[1]) == st.st_size:
+            _file_cache.move_to_end(file_path)
+            return cached[1]
+
+    with open(file_path, 'rb') as f:
+        content = f.read()
+
+    with _file_cache_lock:
+        old = _file_cache.pop(file_path, None)
+        if old is not None:
+            _file_cache_bytes -= len(old[1])
+
+        _file_cache[file_path] = (st.st_mtime_ns, content)
+        _file_cache_bytes += len(content)
+
+        while _file_cache_bytes > FILE_CACHE_MAX_BYTES:
+            _, (_, evicted) = _file_cache.popitem(last=False)
+            _file_cache_bytes -= len(evicted)
+
+    return content
+
+
+def read_request_head(rfile):
+    """
+    Read the request line and headers from a buffered socket file
+
+    Args:
+        rfile: binary file from client_socket.makefile('rb')
+
+    Returns:
+        (request_line, headers) as bytes, header names lower-case,
+        or (None, None) if the connection closed or the request is too long
+    """
+    request_line = rfile.readline(MAX_REQUEST_LINE)
+    if not request_line.endswith(b'\n'):
+        return None, None
+
+    headers = {}
+    for _ in range(MAX_HEADERS):
+        line = rfile.readline(MAX_HEADER_LINE)
+        if line in (b'\r\n', b'\n', b''):
+            return request_line.rstrip(b'\r\n'), headers
+        if not line.endswith(b'\n'):
+            return None, None
+        name, sep, value = line.partition(b':')
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+
+    return None, None
+
+
+def is_not_modified(headers, etag, mtime):
+    """
+    Check a conditional GET against the file's current validators
+
+    Args:
+        headers: request headers with lower-case names
+        etag: current ETag of the file
+        mtime: modification time of the file (seconds)
+
+    Returns:
+        True if the client's copy is still valid (304), False otherwise
+    """
+    if b'if-none-match' in headers:
+        # Weak comparison (RFC 7232): a W/ prefix on either side is ignored
+        tags = [tag.strip().removeprefix(b'W/').decode('latin-1')
+                for tag in headers[b'if-none-match'].split(b',')]
+        return etag in tags or '*' in tags
+
+    if b'if-modified-since' in headers:
+        try:
+            since = parsedate_to_datetime(headers[b'if-modified-since'].decode('latin-1'))
+        except (TypeError, ValueError):
+            return False
+
+        # A '-0000' zone gives a naive datetime; HTTP dates are always UTC
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+
+        # Dates in the future are invalid and must be ignored (RFC 9110)
+        if since > datetime.now(timezone.utc):
+            return False
+
+        return int(mtime) <= since.timestamp()
+
+    return False
+
+
+def send_in_chunks(client_socket, data):
+    with memoryview(data) as view:
+        for offset in range(0, len(view), SEND_CHUNK):
+            client_socket.sendall(view[offset:offset + SEND_CHUNK])
+
+
+def set_cork(client_socket, enabled):
+    if hasattr(socket, 'TCP_CORK'):
+        client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_CORK, 1 if enabled else 0)
+
+
+def handle_request(client_socket, client_ip, request_line, headers, base_directory, real_base):
+    """
+    Answer one request on a connection
+
+    Args:
+        client_socket: connected client socket
+        client_ip: IP address of client
+        request_line: request line without the line ending
+        headers: request headers, lower-case names
+        base_directory: directory to serve files from
+        real_base: resolved path of base_directory
+
+    Returns:
+        True if the connection can be reused for another request
+    """
     thread_id = threading.current_thread().name
+    print(f"[{thread_id}] 📨 Request from {client_ip}: {request_line.decode('latin-1')}")
 
-    try:
-        # Check rate limiting FIRST
-        if is_rate_limited(client_ip):
-            print(f"[{thread_id}] ⛔ Rate limited: {client_ip}")
-            response = "HTTP/1.1 429 Too Many Requests\r\n"
-            response += "Content-Type: text/html\r\n"
-            response += "Retry-After: 1\r\n"
-            response += "\r\n"
-            response += "<html><body><h1>429 Too Many Requests</h1>"
-            response += "<p>Rate limit exceeded. Please slow down.</p>"
-            response += "<p>Limit: 5 requests per second</p>"
-            response += "</body></html>"
-            client_socket.send(response.encode())
-            return
-
-        increment_total_requests()
-        #time.sleep(1)  # 1 second delay
-
-        request = client_socket.recv(1024).decode('utf-8')
-
-        lines = request.split('\n')
-        if not lines:
-            return
-
-        request_line = lines[0]
-        print(f"[{thread_id}] 📨 Request from {client_ip}: {request_line}")
-
-        parts = request_line.split()
-        if len(parts) < 2:
-            return
-
-        method = parts[0]
-        url_path = parts[1]
-
-        if method != 'GET':
-            response = "HTTP/1.1 405 Method Not Allowed\r\n\r\n"
-            client_socket.send(response.encode())
-            return
-
-        if url_path == '/':
-            html_content = generate_directory_listing(base_directory, '/', base_directory)
-            response = "HTTP/1.1 200 OK\r\n"
-            response += "Content-Type: text/html; charset=utf-8\r\n"
-            response += f"Content-Length: {len(html_content.encode())}\r\n"
-            response += "\r\n"
-            client_socket.send(response.encode())
-            client_socket.send(html_content.encode())
-            print(f"[{thread_id}] ✅ Sent directory listing for root /")
-            return
-        else:
-            url_path = url_path.lstrip('/')
+    parts = request_line.split(b' ', 2)
+    if len(parts) < 2:
+        return False
+
+    # HTTP/1.1 keeps the connection open unless the client says otherwise,
+    # HTTP/1.0 only when it asks for it
+    connection = headers.get(b'connection', b'').lower()
+    if len(parts) == 3 and parts[2] == b'HTTP/1.1':
+        keep_alive = connection != b'close'
+    else:
+        keep_alive = connection == b'keep-alive'
+
+    # A request body is never read, so it would be taken for the next
+    # request; close the connection after any request that announces one
+    if b'content-length' in headers or b'transfer-encoding' in headers:
+        keep_alive = False
+
+    # Checked per request, since one connection may carry many
+    if is_rate_limited(client_ip):
+        print(f"[{thread_id}] ⛔ Rate limited: {client_ip}")
+        client_socket.sendall(RESPONSE_429 + CLOSE + BODY_429)
+        return False
+
+    end = KEEP_ALIVE if keep_alive else CLOSE
 
-        file_path = os.path.join(base_directory, url_path)
+    increment_total_requests()
+    if ARTIFICIAL_DELAY:
+        time.sleep(ARTIFICIAL_DELAY)
 
-        real_base = os.path.realpath(base_directory)
-        real_file = os.path.realpath(file_path)
+    method = parts[0]
+    url_path = parts[1].decode('utf-8')
 
-        if not real_file.startswith(real_base):
-            response = "HTTP/1.1 403 Forbidden\r\n\r\n"
-            client_socket.send(response.encode())
-            return
+    # Other methods may carry a body, so the connection is closed
+    # instead of reading on after it
+    if method != b'GET':
+        client_socket.sendall(RESPONSE_405 + CLOSE)
+        return False
 
-        rel_path = os.path.relpath(real_file, real_base)
+    if url_path == '/':
+        # Encoded once; Content-Length is the length in bytes, not characters
+        body = generate_directory_listing(base_directory, '/', base_directory).encode('utf-8')
+        response = "HTTP/1.1 200 OK\r\n"
+        response += "Content-Type: text/html; charset=utf-8\r\n"
+        response += f"Content-Length: {len(body)}\r\n"
+        client_socket.sendall(response.encode() + end + body)
+        print(f"[{thread_id}] ✅ Sent directory listing for root /")
+        return keep_alive
+    else:
+        url_path = url_path.lstrip('/')
 
-        if os.path.isdir(file_path):
-            increment_request_count(rel_path)
+    file_path = os.path.join(base_directory, url_path)
 
-            html_content = generate_directory_listing(file_path, '/' + url_path, base_directory)
+    real_file = os.path.realpath(file_path)
 
-            response = "HTTP/1.1 200 OK\r\n"
-            response += "Content-Type: text/html\r\n"
-            response += f"Content-Length: {len(html_content)}\r\n"
-            response += "\r\n"
-
-            client_socket.send(response.encode())
-            client_socket.send(html_content.encode())
-            print(f"[{thread_id}] ✅ Sent directory listing for {url_path}")
-            return
-
-        if not os.path.isfile(file_path):
-            response = "HTTP/1.1 404 Not Found\r\n"
-            response += "Content-Type: text/html\r\n"
-            response += "\r\n"
-            response += "<html><body><h1>404 Not Found</h1>"
-            response += f"<p>The file '{url_path}' was not found on this server.</p>"
-            response += "</body></html>"
-
-            client_socket.send(response.encode())
-            print(f"[{thread_id}] ❌ 404: {url_path}")
-            return
+    # real_base is resolved once at startup; the separator check keeps
+    # sibling directories like 'content2' out
+    if real_file != real_base and not real_file.startswith(real_base + os.sep):
+        client_socket.sendall(RESPONSE_403 + end)
+        return keep_alive
 
+    rel_path = os.path.relpath(real_file, real_base)
+
+    if os.path.isdir(file_path):
         increment_request_count(rel_path)
-        content_type = get_content_type(file_path)
-
-        if content_type is None:
-            response = "HTTP/1.1 415 Unsupported Media Type\r\n"
-            response += "Content-Type: text/html\r\n"
-            response += "\r\n"
-            response += "<html><body><h1>415 Unsupported Media Type</h1></body></html>"
-            client_socket.send(response.encode())
-            return
-
-        if content_type in ['image/png', 'application/pdf']:
-            with open(file_path, 'rb') as f:
-                file_content = f.read()
-        else:
-            with open(file_path, 'r') as f:
-                file_content = f.read().encode()
+
+        body = generate_directory_listing(file_path, '/' + url_path, base_directory).encode('utf-8')
+
+        response = "HTTP/1.1 200 OK\r\n"
+        response += "Content-Type: text/html; charset=utf-8\r\n"
+        response += f"Content-Length: {len(body)}\r\n"
+
+        client_socket.sendall(response.encode() + end + body)
+        print(f"[{thread_id}] ✅ Sent directory listing for {url_path}")
+        return keep_alive
+
+    if not os.path.isfile(file_path):
+        body = BODY_404 % html.escape(url_path).encode()
+        client_socket.sendall(RESPONSE_404 % len(body) + end + body)
+        print(f"[{thread_id}] ❌ 404: {url_path}")
+        return keep_alive
+
+    increment_request_count(rel_path)
+    content_type = get_content_type(file_path)
+
+    if content_type is None:
+        client_socket.sendall(RESPONSE_415 + end + BODY_415)
+        return keep_alive
+
+    st = os.stat(file_path)
+
+    # Validators built from the stat result, so no file read is needed
+    etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+    cache_headers = f"ETag: {etag}\r\n"
+    cache_headers += f"Last-Modified: {formatdate(st.st_mtime, usegmt=True)}\r\n"
+    cache_headers += f"Cache-Control: public, max-age={CACHE_MAX_AGE}\r\n"
+
+    if is_not_modified(headers, etag, st.st_mtime):
+        response = "HTTP/1.1 304 Not Modified\r\n"
+        response += cache_headers
+        client_socket.sendall(response.encode() + end)
+        print(f"[{thread_id}] ♻️ 304 Not Modified: {url_path}")
+        return keep_alive
+
+    if st.st_size > FILE_CACHE_MAX_FILE:
+        with open(file_path, 'rb') as f:
+            # Content-Length comes from the open file itself, so it matches
+            # what sendfile() sends even if the file was replaced meanwhile
+            size = os.fstat(f.fileno()).st_size
+
+            response = "HTTP/1.1 200 OK\r\n"
+            response += f"Content-Type: {content_type}\r\n"
+            response += f"Content-Length: {size}\r\n"
+            response += cache_headers
+
+            # TCP_CORK (Linux) holds the header back so it leaves together
+            # with the start of the body instead of in its own small packet
+            set_cork(client_socket, True)
+            try:
+                client_socket.sendall(response.encode() + end)
+
+                # Zero-copy: the kernel sends the file straight from the page cache
+                sent = client_socket.sendfile(f, count=size)
+            finally:
+                set_cork(client_socket, False)
+
+        # The file shrank while being sent; the client cannot tell where
+        # the next response would start
+        if sent < size:
+            return False
+    else:
+        file_content = get_cached_file(file_path, st)
 
         response = "HTTP/1.1 200 OK\r\n"
         response += f"Content-Type: {content_type}\r\n"
         response += f"Content-Length: {len(file_content)}\r\n"
-        response += "\r\n"
+        response += cache_headers
+
+        send_in_chunks(client_socket, response.encode() + end + file_content)
+
+    print(f"[{thread_id}] ✅ Sent: {url_path} ({content_type}) - "
+          f"Request #{get_request_count(rel_path)}")
+    return keep_alive
+
+
+def close_connection(client_socket, rfile):
+    if rfile is not None:
+        rfile.close()
+    client_socket.close()
 
-        client_socket.send(response.encode())
-        client_socket.send(file_content)
 
-        print(f"[{thread_id}] ✅ Sent: {url_path} ({content_type}) - "
-              f"Request #{get_request_count(rel_path)}")
+def handle_connection(client_socket, client_address, rfile, base_directory, real_base, resume):
+    """
+    Serve the requests a connection has sent so far. Once nothing more is
+    buffered and the connection stays open, it goes back to the event loop
+    through resume() instead of holding this thread while the client is idle.
+
+    Args:
+        client_socket: connected client socket
+        client_address: (ip, port) of client
+        rfile: buffered reader of the connection, None before its first request
+        base_directory: directory to serve files from
+        real_base: resolved path of base_directory
+        resume: called with (client_socket, client_address, rfile) to hand
+            the connection back to the event loop
+    """
+    client_ip = client_address[0]
+    thread_id = threading.current_thread().name
+    handed_back = False
 
+    try:
+        if rfile is None:
+            # Send small responses right away instead of waiting for ACKs (Nagle)
+            client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            # Let the OS detect peers that vanished without closing the connection
+            client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
+            # Buffered reads return whole lines, however the request is split
+            # into TCP segments, and headers are parsed as bytes. The same reader
+            # is kept for the whole connection so pipelined requests are not lost.
+            rfile = client_socket.makefile('rb', buffering=8192)
+
+        client_socket.settimeout(KEEP_ALIVE_TIMEOUT)
+
+        while True:
+            request_line, headers = read_request_head(rfile)
+            if request_line is None:
+                break
+            if not handle_request(client_socket, client_ip, request_line, headers,
+                                  base_directory, real_base):
+                break
+
+            # A pipelined request may already be buffered or waiting; peek
+            # without blocking, and otherwise let the event loop wait for it
+            client_socket.settimeout(0)
+            pending = rfile.peek(1)
+            client_socket.settimeout(KEEP_ALIVE_TIMEOUT)
+            if not pending:
+                resume(client_socket, client_address, rfile)
+                handed_back = True
+                break
+
+    except socket.timeout:
+        print(f"[{thread_id}] ⏱️ Timed out: {client_ip}")
     except Exception as e:
         print(f"[{thread_id}] ❌ Error: {e}")
         try:
-            response = "HTTP/1.1 500 Internal Server Error\r\n\r\n"
-            client_socket.send(response.encode())
+            client_socket.sendall(RESPONSE_500 + CLOSE)
         except:
             pass
     finally:
-        client_socket.close()
+        flush_request_counts()
+        if not handed_back:
+            close_connection(client_socket, rfile)
+
+
+def serve_forever(server_socket, directory, real_base, pool):
+    """
+    Event loop: epoll (via selectors) waits on the listening socket and on
+    every connection that is waiting for its next request. A connection only
+    goes to a worker thread once data has arrived, and workers hand kept-alive
+    connections back here after each response, so slow or idle clients
+    never tie up a thread.
+
+    Args:
+        server_socket: listening socket
+        directory: directory to serve files from
+        real_base: resolved path of directory
+        pool: thread pool that handles ready connections
+    """
+    selector = selectors.DefaultSelector()
+    server_socket.setblocking(False)
+    selector.register(server_socket, selectors.EVENT_READ)
+
+    # Workers hand connections back through this queue; a byte on the
+    # socket pair wakes select() so they are registered right away
+    returned = queue.SimpleQueue()
+    wake_r, wake_w = socket.socketpair()
+    wake_r.setblocking(False)
+    wake_w.setblocking(False)
+    selector.register(wake_r, selectors.EVENT_READ)
+
+    def resume(client_socket, client_address, rfile):
+        returned.put((client_socket, client_address, rfile))
+        try:
+            wake_w.send(b'\0')
+        except OSError:
+            pass  # already full of wake-ups
+
+    waiting = {}  # {client_socket: deadline} - connections waiting for a request
+
+    try:
+        while True:
+            for key, _ in selector.select(timeout=1.0):
+                if key.fileobj is server_socket:
+                    try:
+                        client_socket, client_address = server_socket.accept()
+                    except BlockingIOError:
+                        continue
+
+                    # Some platforms let accepted sockets inherit non-blocking mode
+                    client_socket.setblocking(True)
+                    selector.register(client_socket, selectors.EVENT_READ, (client_address, None))
+                    waiting[client_socket] = time.monotonic() + REQUEST_TIMEOUT
+                elif key.fileobj is wake_r:
+                    try:
+                        wake_r.recv(4096)
+                    except BlockingIOError:
+                        pass
+                else:
+                    # Request data arrived - hand the connection to a worker
+                    client_socket = key.fileobj
+                    selector.unregister(client_socket)
+                    del waiting[client_socket]
+
+                    client_address, rfile = key.data
+                    pool.submit(handle_connection, client_socket, client_address, rfile,
+                                directory, real_base, resume)
+
+                    # Show active threads count
+                    active_threads = threading.active_count() - 1  # Exclude main thread
+                    print(f"🔄 Active threads: {active_threads}")
+
+            # Wait for the next request on connections the workers handed back
+            while True:
+                try:
+                    client_socket, client_address, rfile = returned.get_nowait()
+                except queue.Empty:
+                    break
+                selector.register(client_socket, selectors.EVENT_READ, (client_address, rfile))
+                waiting[client_socket] = time.monotonic() + KEEP_ALIVE_TIMEOUT
+
+            # Close connections that sent no request in time
+            now = time.monotonic()
+            for client_socket, deadline in list(waiting.items()):
+                if now >= deadline:
+                    key = selector.unregister(client_socket)
+                    del waiting[client_socket]
+                    close_connection(client_socket, key.data[1])
+    finally:
+        for client_socket in waiting:
+            close_connection(client_socket, selector.get_key(client_socket).data[1])
+        selector.close()
+        wake_r.close()
+        wake_w.close()
+
+
+def check_port_free(host, port):
+    # With SO_REUSEPORT the acceptor sockets would quietly share the port
+    # with any other server already listening on it. A plain bind without
+    # that option still fails with EADDRINUSE, so try one first.
+    probe = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        probe.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        probe.bind((host, port))
+    finally:
+        probe.close()
+
+
+def create_server_socket(host, port):
+    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+
+    # Several sockets may bind the same port; the kernel spreads incoming
+    # connections across their accept queues
+    if hasattr(socket, 'SO_REUSEPORT'):
+        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+
+    # Bind and listen
+    server_socket.bind((host, port))
+    server_socket.listen(LISTEN_BACKLOG)
+
+    return server_socket
 
 
 def main():
@@ -303,46 +864,50 @@ def main():
         print(f"Error: Directory '{directory}' does not exist!")
         sys.exit(1)
 
+    # Resolved once here instead of on every request
+    real_base = os.path.realpath(directory)
+
     # Server configuration
     HOST = '0.0.0.0'
     PORT = 8080
 
-    # Create TCP socket
-    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-
-    # Bind and listen
-    server_socket.bind((HOST, PORT))
-    server_socket.listen(10)  # Increased backlog for concurrent connections
+    # Create TCP sockets
+    check_port_free(HOST, PORT)
+    server_sockets = [create_server_socket(HOST, PORT) for _ in range(NUM_ACCEPTORS)]
 
     print(f"🚀 Multithreaded HTTP Server started on http://{HOST}:{PORT}")
     print(f"📁 Serving files from: {os.path.abspath(directory)}")
-    print(f"🧵 Using threading for concurrent request handling")
+    print(f"🧵 Using a pool of {MAX_WORKERS} threads for concurrent request handling")
+    print(f"📥 Accepting connections on {NUM_ACCEPTORS} socket(s)")
     print(f"⚡ Rate limit: {RATE_LIMIT} requests per second per IP")
     print(f"📊 Request counting enabled")
     print("Press Ctrl+C to stop the server\n")
 
-    try:
-        while True:
-            client_socket, client_address = server_socket.accept()
+    threading.Thread(target=reap_idle_clients, name="rate-limit-reaper", daemon=True).start()
+
+    pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="http")
 
-            thread = threading.Thread(
-                target=handle_request,
-                args=(client_socket, client_address, directory),
-                daemon=True
-            )
-            thread.start()
+    # One accept loop per extra socket in the background; the main thread
+    # runs the first one so Ctrl+C still stops the server
+    for i, server_socket in enumerate(server_sockets[1:], start=1):
+        threading.Thread(
+            target=serve_forever,
+            args=(server_socket, directory, real_base, pool),
+            name=f"acceptor-{i}",
+            daemon=True
+        ).start()
 
-            # Show active threads count
-            active_threads = threading.active_count() - 1  # Exclude main thread
-            print(f"🔄 Active threads: {active_threads}")
+    try:
+        serve_forever(server_sockets[0], directory, real_base, pool)
 
     except KeyboardInterrupt:
         print("\n\n🛑 Shutting down server...")
-        print(f"📊 Total requests handled: {total_requests}")
+        print(f"📊 Total requests handled: {get_total_requests()}")
         print("👋 Goodbye!")
     finally:
-        server_socket.close()
+        pool.shutdown(wait=False, cancel_futures=True)
+        for server_socket in server_sockets:
+            server_socket.close()
 
 
 if __name__ == '__main__':
@@ -1,27 +1,29 @@
 #!/usr/bin/env python3
-import threading
 import requests
 import time
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
-def fetch(url):
+# Concurrent requests in flight, and kept-alive connections reused between them
+MAX_WORKERS = 32
+
+def fetch(session, url):
     try:
-        r = requests.get(url)
+        r = session.get(url)
         print(f"{r.status_code} - {len(r.content)} bytes from {url}")
     except Exception as e:
         print(f"Error fetching {url}: {e}")
 
 def run_test(url, num_requests):
-    threads = []
-    start = time.time()
-    for _ in range(num_requests):
-        t = threading.Thread(target=fetch, args=(url,))
-        t.start()
-        threads.append(t)
+    session = requests.Session()
+    session.mount('http://', HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS))
 
-    for t in threads:
-        t.join()
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        list(executor.map(lambda _: fetch(session, url), range(num_requests)))
     end = time.time()
+    session.close()
     print(f"\nTotal time for {num_requests} requests to {url}: {end-start:.2f} seconds\n")
 
 